@@ -1,16 +1,15 @@
 #!/usr/bin/env python3
 
-from xml.etree import ElementTree
+# modules not needed by every run are imported on first use to keep the startup fast
+# (functools is loaded by logging anyway)
 import argparse
+import functools
 import os
 import sys
 import xmlutil
 import osutil
-import datetime
 import re
 import logging
-import traceback
-from textwrap import dedent
 
 """
 Backup solution
@@ -28,12 +27,22 @@ History:
 2013-11-28   use date as folder name for incremental mode
 2018-03-07   support multiple profiles
 2023-07-26   refactoring + automated tests
+2026-10-14   use rsync --link-dest instead of cp -al for incremental mode with --delete
 
 """
 
 MODE_SYNC = "synchronize"  # support only one backup by synchronizing two directories
 MODE_INCR = "incremental"  # support several versions of old backups
 
+HOME_TOOLS_DIR = os.path.join(os.path.expanduser("~"), ".tools")  # searched for the definition file
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.abspath(__file__)))  # searched for the definition file
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "backup")
+CACHE_FILE = os.path.join(CACHE_DIR, "profiles.pickle")  # parsed profiles of the last definition file
+NAMES_CACHE_FILE = os.path.join(CACHE_DIR, "profiles.json")  # names and descriptions of the last definition file
+CACHE_VERSION = 1  # increase if BackupProfile or the result of parse_xml_file changes
+_DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")  # folder name of an incremental backup
+_etree = None  # XML parser module, see _get_etree()
+
 class BackupProfile:
     """Backup profile definition."""
     def __init__(self):
@@ -46,14 +55,39 @@ class BackupProfile:
         self.options = None
         self.backupCount = 3
 
+_DEFAULT_PROFILE = BackupProfile()
+_TEMPLATE_XML = f"""\
+<?xml version="1.0" encoding="UTF-8"?>
+<backup-profiles>
+    <backup-profile>
+        <name>PROFILE NAME</name>
+        <description>PROFILE DESCRIPTION</description>
+        <source>SOURCE FOLDER</source>
+        <target>TARGET FOLDER</target>
+        <!-- Optional: {MODE_INCR} or {MODE_SYNC} -->
+        <mode>{_DEFAULT_PROFILE.mode}</mode>
+        <!-- Optional: add one or more rsync options -->
+        <option>-rltvzi</option>
+        <!-- Optional: max. number of incremental backups that must not be deleted -->
+        <count>{_DEFAULT_PROFILE.backupCount}</count>
+    </backup-profile>
+</backup-profiles>"""  # printed by --print-profile-template
+
+def _print(*lines):
+    """Prints the given lines without being interrupted by other threads."""
+    with osutil.PRINT_LOCK:
+        print("\n".join(lines), flush=True)
+
 def _remove_incremental_backup(folder, args):
     """Removes an incremental backup."""
-    if not os.path.exists(folder):
-        if args.verbose:
-            print(f'Folder does not exist: {folder}')
-        return
+    # rm -rf silently ignores a missing folder
     osutil.execute_command(["rm", "-rf", folder], shell=False, verbose=args.verbose, simulate=args.simulate)
 
+def _link_incremental_backup(source, target, args):
+    """Hard-links all files of an incremental backup into a new one."""
+    # the trailing "." copies the content of source, even if target already exists
+    osutil.execute_command(["cp", "-al", os.path.join(source, "."), target], shell=False, verbose=args.verbose, simulate=args.simulate)
+
 # def _move_incremental_backup(source, target, args):
     # """Moves an incremental backup."""
     # if not os.path.exists(source):
@@ -62,45 +96,31 @@ def _remove_incremental_backup(folder, args):
         # return
     # osutil.execute_command(["mv", source, target], shell=False, verbose=args.verbose, simulate=args.simulate)
     
-def _copy_incremental_backup(source, target, args):
-    """Copies an incremental backup."""
-    if not os.path.exists(source):
-        if args.verbose:
-            print(f'Source does not exist: {source}')
-        return
-    if os.path.abspath(source) == os.path.abspath(target):
-        if args.verbose:
-            print(f'Source and target are equal: {source}')
-        return
-    osutil.execute_command(["cp", "-al", source, target], shell=False, verbose=args.verbose, simulate=args.simulate)
-
 def _analyse_backup_folder(dir, backupCount):
     """Analyse backup folder and returns the folder to copy and all folders to delete."""
+    # resolve absolute path only once, entries of scandir are joined to it
+    dir = os.path.abspath(dir)
+    import datetime
     now = datetime.datetime.now()
     folderName = now.strftime("%Y-%m-%d")
     toUse = os.path.join(dir, folderName)
     toCopy = None
     toDelete = None
 
-    # get folders
-    dirs = set()
-    for f in os.listdir(dir):
-        path = os.path.join(dir, f)
-        if os.path.isdir(path):
-            dirs.add(os.path.abspath(path))
-    
-    # filter by date pattern
-    dirs = [d for d in dirs if re.match("^\d\d\d\d-\d\d-\d\d$", os.path.basename(d)) is not None]
-    dirs = sorted(dirs)
-    dirs.reverse()
+    # get folders filtered by date pattern (scandir avoids a stat call per entry)
+    with os.scandir(dir) as it:
+        dirs = [e.path for e in it if e.is_dir(follow_symlinks=False) and _DATE_DIR_RE.match(e.name) is not None]
     if len(dirs) > 0:
-        toCopy = dirs[0]
+        # only the newest and the oldest backup are required, no need to sort
+        toCopy = max(dirs, key=os.path.basename)
         if toCopy == toUse:
             # copy not necessary if source and target are the same dir
             toCopy = None
-        elif len(dirs) >= backupCount:
-            #toDelete = dirs[backupCount-1:len(dirs)]
-            toDelete = dirs[-1]
+        if len(dirs) >= backupCount:
+            toDelete = min(dirs, key=os.path.basename)
+            if toDelete == toUse:
+                # never delete the backup that is about to be updated
+                toDelete = None
     
     logging.debug(f'Folder to use:    {toUse}')
     logging.debug(f'Folder to copy:   {toCopy}')
@@ -109,25 +129,24 @@ def _analyse_backup_folder(dir, backupCount):
 
 def _check_pre_conditions(source, target):
     """Check pre-conditions."""
-    if not os.path.exists(source):
+    # stop at the first entry instead of listing the whole source
+    try:
+        with os.scandir(source) as it:
+            if next(it, None) is None:
+                raise Exception(f'Source is empty: {source}')
+    except FileNotFoundError:
         raise Exception(f'Source does not exist: {source}')
-    if len(os.listdir(source)) == 0:
-        raise Exception(f'Source is empty: {source}')
     if not os.path.exists(target):
         raise Exception(f'Target does not exist: {target}')
 
-def _sync_dirs(profile, source, target, args, prompt=False):
-    """Synchronize source to target."""
-    # normalize file paths
-    if not source.endswith("/"):
-        # force the trailing slash to copy the content of the source directory
-        source += "/"
-    if not target.endswith("/"):
-        target += "/"
-    
-    print(f'Synchronizing from {source} to {target}')
-    if prompt and not args.simulate and not getYesOrNo('Do you want to continue?', None):
-        return
+def _dir_path(path):
+    """Forces the trailing slash to copy the content of the directory."""
+    if not path.endswith("/"):
+        path += "/"
+    return path
+
+def _build_rsync_cmd(profile, sources, target, args, linkDest=None):
+    """Returns the rsync command to synchronize all sources to target."""
     cmd = list()
     cmd.append("rsync")
     if len(profile.options) != 0:
@@ -141,10 +160,101 @@ def _sync_dirs(profile, source, target, args, prompt=False):
         cmd.append("--delete")
     if args.simulate:
         cmd.append("-n")
+    if linkDest is not None:
+        cmd.append(f"--link-dest={linkDest}")
         
-    cmd.append(source)
-    cmd.append(target)
-    osutil.execute_command(cmd, verbose=args.verbose)
+    for source in sources:
+        cmd.append(_dir_path(source))
+    cmd.append(_dir_path(target))
+    return cmd
+
+def _execute_rsync(cmd, args):
+    """Executes rsync. The output of parallel backups is printed at once per rsync call, so that the files of several profiles are not mixed up."""
+    osutil.execute_command(cmd, verbose=args.verbose, bufferOutput=args.parallel > 1 and not args.restore)
+
+def _sync_dirs(profile, source, target, args, prompt=False, linkDest=None):
+    """Synchronize source to target.
+    Unchanged files are hard-linked from linkDest if given (rsync --link-dest).
+    """
+    _print(f'Synchronizing from {_dir_path(source)} to {_dir_path(target)}')
+    if prompt and not args.simulate and not getYesOrNo('Do you want to continue?', None):
+        return
+    cmd = _build_rsync_cmd(profile, [source], target, args, linkDest=linkDest)
+    _execute_rsync(cmd, args)
+
+def _sync_many(profiles, args):
+    """Synchronizes the sources of several profiles to their common target with a single rsync call."""
+    sources = [p.source for p in profiles]
+    target = profiles[0].target
+    for source in sources:
+        _check_pre_conditions(source, target)
+
+    # print message
+    info = f'Starting backup from {", ".join(sources)} to {target}'
+    if args.simulate:
+        info += ' (dry-run)'
+    _print(f'===== Backup profiles: {", ".join(p.name for p in profiles)}', info, '')
+
+    _print(f'Synchronizing from {", ".join(_dir_path(s) for s in sources)} to {_dir_path(target)}')
+    cmd = _build_rsync_cmd(profiles[0], sources, target, args)
+    _execute_rsync(cmd, args)
+
+def _group_profiles(profiles, args):
+    """Groups synchronize profiles with the same target and options if --combine is given, so that they can be backed up by a single rsync call.
+    Profiles deleting files in target (--delete or a --del* option) are not grouped as rsync would keep the files of all sources.
+    If several sources of a group contain the same file, rsync copies only the one of the first source, i.e. of the profile given first.
+    Without grouping, the profiles are synchronized one after another and the last profile wins.
+    """
+    groups = dict()
+    for profile in profiles:
+        key = id(profile)
+        deletes = args.delete or any(o.startswith("--del") for o in profile.options)
+        if args.combine and profile.mode == MODE_SYNC and not deletes:
+            key = (os.path.normpath(profile.target), tuple(profile.options))
+        groups.setdefault(key, []).append(profile)
+    return list(groups.values())
+
+def _backup_group(profiles, args):
+    """Creates backups of a group of profiles (see _group_profiles)."""
+    if len(profiles) == 1:
+        backup(profiles[0], args)
+    else:
+        _sync_many(profiles, args)
+
+def _targets_overlap(target, other):
+    """Returns True if both targets are the same folder or one contains the other."""
+    return os.path.commonpath([target, other]) in (target, other)
+
+def _parallel_lanes(groups):
+    """Distributes the groups to lanes that can be backed up at the same time.
+    Groups with equal or nested targets write to the same files, so they are put into the same lane and backed up one after another in the given order.
+    """
+    lanes = []  # targets and groups of each lane
+    for group in groups:
+        target = os.path.abspath(group[0].target)
+        overlapping = [l for l in lanes if any(_targets_overlap(target, t) for t in l[0])]
+        if not overlapping:
+            lanes.append(([target], [group]))
+            continue
+        # the group joins the first overlapping lane, which takes over all other overlapping lanes
+        targets, members = overlapping[0]
+        for other in overlapping[1:]:
+            lanes.remove(other)
+            targets.extend(other[0])
+            members.extend(other[1])
+        targets.append(target)
+        members.append(group)
+    return [members for targets, members in lanes]
+
+def _backup_lane(groups, args):
+    """Creates backups of the groups one after another and returns the failed groups with their error."""
+    errors = []
+    for group in groups:
+        try:
+            _backup_group(group, args)
+        except Exception as e:
+            errors.append((group, e))
+    return errors
 
 def backup(profile, args):
     """Creates backups of the given profile.
@@ -156,12 +266,10 @@ def backup(profile, args):
     _check_pre_conditions(source, target)
             
     # print message
-    print(f'===== Backup profile: {profile.name}')
     info = f'Starting backup from {source} to {target}'
     if args.simulate:
         info += ' (dry-run)'
-    print(info)
-    print()
+    _print(f'===== Backup profile: {profile.name}', info, '')
     
     if profile.mode == MODE_INCR:
         # analyse backup folder
@@ -169,21 +277,29 @@ def backup(profile, args):
 
         # Remove oldest backup: rm -rf backup.max
         if toDelete is not None:
-            print(f'Removing oldest backup: {toDelete}')
+            _print(f'Removing oldest backup: {toDelete}')
             _remove_incremental_backup(toDelete, args)
+            if toDelete == toCopy:
+                # a removed backup cannot be used for hard links
+                toCopy = None
 
-        # copy last backup into new one: cp -al backup.0 backup.1
+        if not args.simulate:
+            os.makedirs(toUse, exist_ok=True)
+        linkDest = None
         if toCopy is not None:
-            print(f'Copying newest incremental backup: {toCopy}')
-            _copy_incremental_backup(toCopy, toUse, args)
-        
-        # set target to first incremental backup 
-        target = toUse
-        if args.simulate and toCopy is not None:
-            target = toCopy
-
-    # synchronize source to target
-    _sync_dirs(profile, source, target, args)
+            if args.delete:
+                # unchanged files are hard-linked to the last backup: rsync --link-dest=backup.0 src backup.1
+                _print(f'Linking unchanged files to newest incremental backup: {toCopy}')
+                linkDest = toCopy
+            else:
+                # keep files that no longer exist in source: cp -al backup.0 backup.1
+                # rsync replaces changed files instead of writing into the hard links, so backup.0 is not modified
+                _print(f'Linking newest incremental backup: {toCopy}')
+                _link_incremental_backup(toCopy, toUse, args)
+        _sync_dirs(profile, source, toUse, args, linkDest=linkDest)
+    else:
+        # synchronize source to target
+        _sync_dirs(profile, source, target, args)
 
 def restore(profile, args):
     """Restore backup of the given profile (switch source/target).
@@ -222,40 +338,135 @@ def restore(profile, args):
     # synchronize source to target
     _sync_dirs(profile, source, target, args, prompt=True)
     
+def _get_etree():
+    """Imports the XML parser on first use (lxml's faster parser is used if available)."""
+    global _etree
+    if _etree is None:
+        try:
+            from lxml import etree
+        except ImportError:
+            from xml.etree import ElementTree as etree
+        _etree = etree
+    return _etree
+
 def parse_xml_file(file):
     """Parses the xml file."""
-    tree = ElementTree.parse(file)
-    root = tree.getroot()
+    ElementTree = _get_etree()
     errors = []
     profiles = []
     usedNames = set()
-    for child in root:
-        profile = BackupProfile()
-        profile.name = xmlutil.parse_xml_tag(child, "name")
-        profile.description = xmlutil.parse_xml_tag(child, "description")
-        profile.source = xmlutil.parse_xml_tag(child, "source")
-        profile.target = xmlutil.parse_xml_tag(child, "target")
-        profile.options = xmlutil.parse_xml_tag_list(child, "option")
-        mode = xmlutil.parse_xml_tag(child, "mode")
-        if mode is not None:
-            profile.mode = mode
-        backupCount = xmlutil.parse_xml_tag(child, "count")
-        if backupCount is not None:
-            profile.backupCount = int(backupCount)
-        profiles.append(profile)
+    root = None
+    depth = 0
+    try:
+        # stream the file so that only one profile is kept in memory
+        for event, child in ElementTree.iterparse(file, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = child
+                depth += 1
+                continue
+            depth -= 1
+            # each child of the root is a profile
+            if depth != 1:
+                continue
+            profile = BackupProfile()
+            profile.name = xmlutil.parse_xml_tag(child, "name")
+            profile.description = xmlutil.parse_xml_tag(child, "description")
+            profile.source = xmlutil.parse_xml_tag(child, "source")
+            profile.target = xmlutil.parse_xml_tag(child, "target")
+            profile.options = xmlutil.parse_xml_tag_list(child, "option")
+            mode = xmlutil.parse_xml_tag(child, "mode")
+            if mode is not None:
+                profile.mode = mode
+            backupCount = xmlutil.parse_xml_tag(child, "count")
+            if backupCount is not None:
+                profile.backupCount = int(backupCount)
+            profiles.append(profile)
             
-        # validate profile
-        if profile.name is None:
-            errors.append(f'{profile.name}: Tag <name> is required.')
-        if profile.name in usedNames:
-            errors.append(f'{profile.name}: A profile with this name already exists.')
-        usedNames.add(profile.name)
-        if profile.source is None:
-            errors.append(f'{profile.name}: Tag <source> is required.')
-        if profile.target is None:
-            errors.append(f'{profile.name}: Tag <target> is required.')
-        if profile.mode not in (MODE_INCR, MODE_SYNC):
-            errors.append(f'{profile.name}: Unsupported mode: "{profile.mode}" -> allowed values are "{MODE_INCR}" or "{MODE_SYNC}".')
+            # validate profile
+            if profile.name is None:
+                errors.append(f'{profile.name}: Tag <name> is required.')
+            if profile.name in usedNames:
+                errors.append(f'{profile.name}: A profile with this name already exists.')
+            usedNames.add(profile.name)
+            if profile.source is None:
+                errors.append(f'{profile.name}: Tag <source> is required.')
+            if profile.target is None:
+                errors.append(f'{profile.name}: Tag <target> is required.')
+            if profile.mode not in (MODE_INCR, MODE_SYNC):
+                errors.append(f'{profile.name}: Unsupported mode: "{profile.mode}" -> allowed values are "{MODE_INCR}" or "{MODE_SYNC}".')
+
+            # release the parsed element
+            child.clear()
+            root.remove(child)
+    except ElementTree.ParseError as e:
+        errors.append(f'Invalid XML: {e}')
+    return profiles, errors
+
+def _cache_key(file):
+    """Returns the key to identify the given version of the definition file."""
+    st = os.stat(file)
+    return os.path.abspath(file), st.st_mtime_ns, st.st_size
+
+def _load_cached_profiles(file):
+    """Loads the profiles from the cache or returns None if the definition file has been changed."""
+    import pickle
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            version, path, mtimeNs, size, profiles = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.debug(f'Ignoring invalid cache file {CACHE_FILE}: {e}')
+        return None
+    if (version, path, mtimeNs, size) != (CACHE_VERSION, *_cache_key(file)):
+        return None
+    logging.debug(f'Using cached definition file: {file}')
+    return profiles
+
+def _save_cached_profiles(file, profiles):
+    """Stores the valid profiles of the given definition file in the cache."""
+    import json
+    import pickle
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        os.makedirs(os.path.dirname(NAMES_CACHE_FILE), exist_ok=True)
+        key = (CACHE_VERSION, *_cache_key(file))
+        with open(CACHE_FILE, 'wb') as f:
+            pickle.dump((*key, profiles), f)
+        with open(NAMES_CACHE_FILE, 'w') as f:
+            json.dump([*key, [(p.name, p.description) for p in profiles]], f)
+    except OSError as e:
+        logging.debug(f'Cannot write cache file: {e}')
+
+def _load_cached_profile_names(file):
+    """Loads names and descriptions of the profiles or returns None if the definition file has been changed."""
+    import json
+    try:
+        with open(NAMES_CACHE_FILE, 'r') as f:
+            version, path, mtimeNs, size, names = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.debug(f'Ignoring invalid cache file {NAMES_CACHE_FILE}: {e}')
+        return None
+    if (version, path, mtimeNs, size) != (CACHE_VERSION, *_cache_key(file)):
+        return None
+    logging.debug(f'Using cached profile names of definition file: {file}')
+    return names
+
+@functools.lru_cache(maxsize=32)
+def _load_profiles(file, mtimeNs, size):
+    """Returns profiles and errors of the definition file (see _cache_key).
+    The result is kept in memory, so repeated calls in the same process neither read the cache nor parse the file again.
+    """
+    profiles = _load_cached_profiles(file)
+    if profiles is not None:
+        return profiles, []
+    logging.debug(f'Parsing definition file: {file}')
+    profiles, errors = parse_xml_file(file)
+    if not errors:
+        _save_cached_profiles(file, profiles)
     return profiles, errors
 
 def print_profile_detail(profile):
@@ -269,9 +480,12 @@ def print_profile_detail(profile):
         print(f'  {"Backup Count":<15}: {profile.backupCount}')
 
 def print_available_profiles(profiles):
+    _print_profile_names([(p.name, p.description) for p in profiles])
+
+def _print_profile_names(names):
     print('Available backup profiles: ')
-    for p in profiles:
-        print(f'  {p.name:<15}: {p.description}')
+    for name, description in names:
+        print(f'  {name:<15}: {description}')
 
 def _findProfileDefinitionFile(fileName):
     """Searches for a file using following order:
@@ -284,20 +498,24 @@ def _findProfileDefinitionFile(fileName):
         fileCandidates.append(fileName)
     else:
         fileCandidates.append(os.path.join(os.getcwd(), fileName))
-        fileCandidates.append(os.path.join(os.path.expanduser("~user"), ".tools", fileName))
-        fileCandidates.append(os.path.join(os.path.dirname(os.path.realpath(os.path.abspath(__file__))), fileName))
+        fileCandidates.append(os.path.join(HOME_TOOLS_DIR, fileName))
+        fileCandidates.append(os.path.join(SCRIPT_DIR, fileName))
     
     for f in fileCandidates:
-        if os.path.exists(f): 
+        try:
+            os.stat(f)
             return f, fileCandidates
+        except OSError:
+            # e.g. missing, not a directory or no permission: try next candidate
+            continue
     return None, fileCandidates
 
 def getYesOrNo(question, default=True):
     valid = {"yes": True, "y": True, "ye": True, "no": False, "n": False}
     prompt = {True: " [Y/n] ", False: " [y/N] ", None: " [y/n] "}
+    message = question + prompt[default]
     while True:
-        print(question + prompt[default], end='')
-        choice = input().lower()
+        choice = input(message).strip().lower()
         if default is not None and choice == "":
             return default
         elif choice in valid:
@@ -316,6 +534,8 @@ def main(argv=None):
         parser.add_argument('-p', '--profile-details', action='store_true', dest='profileDetails', help='show all details of specified profiles')
         parser.add_argument('-t', '--print-profile-template', dest='printTemplate', action='store_true', help='print XML profile template file to stdout')
         parser.add_argument('--delete', action='store_true', help='delete files on target if they no longer exist')
+        parser.add_argument('--combine', action='store_true', help='back up synchronize profiles with the same target and options by a single rsync call')
+        parser.add_argument('--parallel', type=int, default=1, metavar='N', help='number of profiles to back up at the same time (default: 1)')
         parser.add_argument('--restore', action='store_true', help='restore backup to source directory (switch source/target)')
         parser.add_argument('--restore-date', dest='restoreDate', help='date of backup to restore for incremental backups')
         parser.add_argument('profile', nargs='*', help='name of profile to backup')
@@ -326,31 +546,19 @@ def main(argv=None):
         logging.basicConfig(format='%(levelname)s: %(message)s', level=level, force=True)
         
         if args.printTemplate:
-            defaultTemplate = BackupProfile()
-            xml = f"""\
-                <?xml version="1.0" encoding="UTF-8"?>
-                <backup-profiles>
-                    <backup-profile>
-                        <name>PROFILE NAME</name>
-                        <description>PROFILE DESCRIPTION</description>
-                        <source>SOURCE FOLDER</source>
-                        <target>TARGET FOLDER</target>
-                        <!-- Optional: {MODE_INCR} or {MODE_SYNC} -->
-                        <mode>{defaultTemplate.mode}</mode>
-                        <!-- Optional: add one or more rsync options -->
-                        <option>-rltvzi</option>
-                        <!-- Optional: max. number of incremental backups that must not be deleted -->
-                        <count>{defaultTemplate.backupCount}</count>
-                    </backup-profile>
-                </backup-profiles>"""
-            print(dedent(xml))
+            print(_TEMPLATE_XML)
             exit(0)
 
         # read all defined backup profiles
         file, fileCandidates = _findProfileDefinitionFile(args.file)
         if file:
-            logging.debug(f'Parsing definition file: {file}')
-            definedProfiles, errors = parse_xml_file(file)
+            if not args.profile and not args.profileDetails:
+                # listing the profiles requires only names and descriptions
+                names = _load_cached_profile_names(file)
+                if names is not None:
+                    _print_profile_names(names)
+                    exit(0)
+            definedProfiles, errors = _load_profiles(*_cache_key(file))
             if errors:
                 print(f'Definition file: {file}')
                 print()
@@ -372,8 +580,9 @@ def main(argv=None):
         # find given profiles
         nonFoundProfileNames = list()
         foundProfiles = list()
+        profilesByName = {p.name: p for p in definedProfiles}
         for name in args.profile:
-            profile = next((p for p in definedProfiles if p.name == name), None)
+            profile = profilesByName.get(name)
             if profile is None:
                 nonFoundProfileNames.append(name)
             else:
@@ -398,16 +607,37 @@ def main(argv=None):
             exit(0)
 
         # perform action
-        for i, profile in enumerate(foundProfiles):
-            if i > 0:
-                print()
-            if args.restore:
+        if args.restore:
+            # restore is always sequential due to the interactive prompt
+            for i, profile in enumerate(foundProfiles):
+                if i > 0:
+                    print()
                 restore(profile, args)
+        else:
+            # with --combine, profiles with the same target are synchronized by a single rsync call
+            groups = _group_profiles(foundProfiles, args)
+            if args.parallel > 1:
+                # rsync is mostly waiting for I/O, so several profiles can be backed up at the same time
+                import concurrent.futures
+                with concurrent.futures.ThreadPoolExecutor(max_workers=args.parallel) as executor:
+                    futures = [executor.submit(_backup_lane, lane, args) for lane in _parallel_lanes(groups)]
+                # report the errors of all profiles, not only the first one
+                failed = 0
+                for future in futures:
+                    for group, e in future.result():
+                        failed += 1
+                        _print(f'Backup of {", ".join(p.name for p in group)} failed: {e}')
+                if failed:
+                    raise Exception(f'{failed} of {len(groups)} backups failed')
             else:
-                backup(profile, args)
+                for i, group in enumerate(groups):
+                    if i > 0:
+                        print()
+                    _backup_group(group, args)
     except Exception as e:
         print(e)
         if args.debug:
+            import traceback
             traceback.print_exc()
 
 if __name__ == '__main__':
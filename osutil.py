@@ -2,37 +2,61 @@
 
 import logging
 import os
+import shlex
 import subprocess
 import sys
+import threading
 
-def execute_command(cmd, shell=False, verbose=False, simulate=False, ignoreError=False, stdout=None, stderr=None):
-    """Executes the given command."""
+PRINT_LOCK = threading.Lock()  # keeps output of commands executed by several threads line by line
+
+def execute_command(cmd, shell=False, verbose=False, simulate=False, ignoreError=False, stdout=None, stderr=None, bufferOutput=False):
+    """Executes the given command.
+    With bufferOutput the output is printed at once when the command has finished, so that it does not interleave with the output of other threads.
+    """
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    # format the command only once and only if it is printed
+    cmdStr = _cmd_to_str(cmd) if verbose or simulate or debug else None
     if verbose or simulate:
-        print(_cmd_to_str(cmd))
+        with PRINT_LOCK:
+            print(cmdStr)
     if simulate:
         return None
 
     # flush stdout to keep output synchronized
     sys.stdout.flush()
         
-    logging.debug("Command: " + _cmd_to_str(cmd))
-    p = subprocess.Popen(cmd, shell=shell, stdout=stdout, stderr=stderr, universal_newlines=True)
-    p.wait()
-    if not ignoreError and p.poll() != 0:
+    if debug:
+        logging.debug("Command: " + cmdStr)
+    if bufferOutput or stdout == subprocess.PIPE or stderr == subprocess.PIPE:
+        p = _stream_command(cmd, shell, bufferOutput)
+    else:
+        # output is written directly to the terminal
+        p = subprocess.run(cmd, shell=shell, stdout=stdout, stderr=stderr, text=True, encoding="utf-8", errors="replace", check=False)
+    if not ignoreError and p.returncode != 0:
         raise Exception("Command failed: " + " ".join(cmd))
     return p
 
+def _stream_command(cmd, shell, buffered=False):
+    """Executes the given command and forwards its output line by line to stdout (or at once at the end if buffered).
+    Stderr is merged into stdout to avoid blocking on a full pipe.
+    """
+    lines = []
+    with subprocess.Popen(cmd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=1, text=True, encoding="utf-8", errors="replace") as p:
+        for line in iter(p.stdout.readline, ""):
+            if not buffered:
+                with PRINT_LOCK:
+                    sys.stdout.write(line)
+                    sys.stdout.flush()
+            lines.append(line)
+    output = "".join(lines)
+    if buffered and output:
+        with PRINT_LOCK:
+            sys.stdout.write(output)
+            sys.stdout.flush()
+    return subprocess.CompletedProcess(cmd, p.returncode, stdout=output)
+
 def _cmd_to_str(cmd):
     """Converts a command to string."""
     if isinstance(cmd, str):
         return cmd
-    cmdStr = ""
-    for c in cmd:
-        # add quotes if parameter contains a space
-        if " " in c:
-            cmdStr += "\"" + c + "\" "
-        else:
-            cmdStr += c + " "
-    cmdStr = cmdStr.strip()
-    return cmdStr
-
+    return shlex.join(cmd)
@@ -5,6 +5,8 @@ import os
 import sys
 import shutil
 import datetime
+import io
+import pickle
 from unittest import mock
 from unittest import TestCase
 
@@ -14,24 +16,51 @@ sys.path.insert(0, os.path.dirname(PROJECT_DIR))
 import backup
 ROOT_DIR = os.path.join(PROJECT_DIR, 'root')
 SRC_1_DIR = os.path.join(ROOT_DIR, 'src-1')
+SRC_2_DIR = os.path.join(ROOT_DIR, 'src-2')
 DST_1_DIR = os.path.join(ROOT_DIR, 'dst-1')
+DST_2_DIR = os.path.join(ROOT_DIR, 'dst-2')
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache')
 TEST_XML = os.path.join(PROJECT_DIR, 'backup-test.xml')
 TEST_ERROR_XML = os.path.join(PROJECT_DIR, 'backup-test-error.xml')
 PROFILE_SYNC = 'sync'
+PROFILE_SYNC_2 = 'sync-2'
+PROFILE_SYNC_DST_2 = 'sync-dst-2'
+PROFILE_SYNC_DELETE = 'sync-delete'
+PROFILE_SYNC_2_DELETE = 'sync-2-delete'
 PROFILE_SYNC_EXCLUDE = 'sync-exclude'
 PROFILE_INCR = 'incr'
 
+def _fast_rmtree(path):
+    """Removes a directory tree using the file types cached by os.scandir."""
+    try:
+        it = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _fast_rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
 # Usage:
 # > test_backup.py
 # > test_backup.py TestBackup.test_remove_unmanaged_forced
 
 class TestBackup(unittest.TestCase):
     def setUp(self):
-        os.makedirs(ROOT_DIR, exist_ok=True)
-        shutil.rmtree(ROOT_DIR)
+        # _fast_rmtree ignores a missing root folder
+        _fast_rmtree(ROOT_DIR)
         
         os.makedirs(SRC_1_DIR, exist_ok=True)
         os.makedirs(DST_1_DIR, exist_ok=True)
+
+        # use an empty cache for each test instead of the cache of the user
+        patcher = mock.patch.multiple(backup, CACHE_DIR=CACHE_DIR, CACHE_FILE=os.path.join(CACHE_DIR, 'profiles.pickle'), NAMES_CACHE_FILE=os.path.join(CACHE_DIR, 'profiles.json'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        backup._load_profiles.cache_clear()
    
     def test_xmlfile_default(self):
         print('======= test_xmlfile_default ===')
@@ -51,12 +80,81 @@ class TestBackup(unittest.TestCase):
         with self.assertRaises(SystemExit) as cm:
             backup.main(['--debug', '--file', TEST_XML, '-p'])
         self.assertEqual(cm.exception.code, 0)
+    def test_xmlfile_not_found(self):
+        print('======= test_xmlfile_not_found ===')
+        # parent of the definition file is a file instead of a folder
+        self._createFiles(ROOT_DIR, 1, 'notadir')
+        with self.assertRaises(SystemExit) as cm:
+            backup.main(['--debug', '--file', os.path.join(ROOT_DIR, 'notadir-1.txt', 'backup.xml'), '-p'])
+        self.assertEqual(cm.exception.code, 1)
+    def test_xmlfile_any_tag(self):
+        print('======= test_xmlfile_any_tag ===')
+        # each child of the root is a profile regardless of its tag name
+        xmlFile = os.path.join(ROOT_DIR, 'backup.xml')
+        with open(xmlFile, 'w') as f:
+            f.write('<backup-profiles><!-- comment --><profile><name>other</name><source>s</source><target>t</target></profile></backup-profiles>')
+        self.assertEqual(self._runMain(['--debug', '--file', xmlFile, '-p', 'other']), 0)
     def test_xmlfile_validate(self):
         print('======= test_xmlfile_validate ===')
         with self.assertRaises(SystemExit) as cm:
             backup.main(['--debug', '--file', TEST_ERROR_XML, '-p'])
         self.assertEqual(cm.exception.code, 1)
 
+    def test_cache_hit(self):
+        print('======= test_cache_hit ===')
+        with mock.patch('backup.parse_xml_file', wraps=backup.parse_xml_file) as parse:
+            self.assertEqual(self._runMain(['--debug', '--file', TEST_XML, '-p', PROFILE_SYNC]), 0)
+            backup._load_profiles.cache_clear()
+            self.assertEqual(self._runMain(['--debug', '--file', TEST_XML, '-p', PROFILE_SYNC]), 0)
+        self.assertEqual(parse.call_count, 1)
+        self.assertTrue(os.path.exists(backup.CACHE_FILE))
+    def test_cache_changed(self):
+        print('======= test_cache_changed ===')
+        xmlFile = self._copyXml()
+        with mock.patch('backup.parse_xml_file', wraps=backup.parse_xml_file) as parse:
+            self.assertEqual(self._runMain(['--debug', '--file', xmlFile, '-p', PROFILE_SYNC]), 0)
+            self._renameProfile(xmlFile, PROFILE_SYNC, 'sync-renamed')
+            backup._load_profiles.cache_clear()
+            self.assertEqual(self._runMain(['--debug', '--file', xmlFile, '-p', 'sync-renamed']), 0)
+        self.assertEqual(parse.call_count, 2)
+    def test_cache_corrupt(self):
+        print('======= test_cache_corrupt ===')
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(backup.CACHE_FILE, 'wb') as f:
+            f.write(b'no pickle')
+        with mock.patch('backup.parse_xml_file', wraps=backup.parse_xml_file) as parse:
+            self.assertEqual(self._runMain(['--debug', '--file', TEST_XML, '-p', PROFILE_SYNC]), 0)
+        self.assertEqual(parse.call_count, 1)
+    def test_cache_version(self):
+        print('======= test_cache_version ===')
+        # cache of an older version without any profile
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(backup.CACHE_FILE, 'wb') as f:
+            pickle.dump((backup.CACHE_VERSION - 1, *backup._cache_key(TEST_XML), []), f)
+        with mock.patch('backup.parse_xml_file', wraps=backup.parse_xml_file) as parse:
+            self.assertEqual(self._runMain(['--debug', '--file', TEST_XML, '-p', PROFILE_SYNC]), 0)
+        self.assertEqual(parse.call_count, 1)
+    def test_names_cache(self):
+        print('======= test_names_cache ===')
+        self.assertEqual(self._runMain(['--debug', '--file', TEST_XML, '-p', PROFILE_SYNC]), 0)
+        backup._load_profiles.cache_clear()
+        # listing profiles uses the names only
+        with mock.patch('backup._load_profiles') as load, mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            self.assertEqual(self._runMain(['--debug', '--file', TEST_XML]), 0)
+        load.assert_not_called()
+        self.assertIn(PROFILE_SYNC_EXCLUDE, out.getvalue())
+    def test_names_cache_changed(self):
+        print('======= test_names_cache_changed ===')
+        xmlFile = self._copyXml()
+        self.assertEqual(self._runMain(['--debug', '--file', xmlFile]), 0)
+        self._renameProfile(xmlFile, PROFILE_SYNC_EXCLUDE, 'sync-exclude-renamed')
+        with mock.patch('backup.parse_xml_file', wraps=backup.parse_xml_file) as parse, mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            self.assertEqual(self._runMain(['--debug', '--file', xmlFile]), 0)
+        self.assertEqual(parse.call_count, 1)
+        self.assertIn('sync-exclude-renamed', out.getvalue())
+        self.assertNotIn(f'{PROFILE_SYNC_EXCLUDE} ', out.getvalue())
+        self.assertIn(['sync-exclude-renamed', 'SYNC backup profile with exclude'], backup._load_cached_profile_names(xmlFile))
+
     def test_sync_dryrun(self):
         print('======= test_sync_dryrun ===')
         self._createFiles(SRC_1_DIR, 5)
@@ -78,6 +176,95 @@ class TestBackup(unittest.TestCase):
         self._createFiles(DST_1_DIR, 7, 'deleteme')
         backup.main(['--debug', '--file', TEST_XML, '--delete', PROFILE_SYNC])
         self.assertEqual(len(os.listdir(DST_1_DIR)), 5)
+    def test_sync_many(self):
+        print('======= test_sync_many ===')
+        self._createFiles(SRC_1_DIR, 5)
+        self._createFiles(SRC_2_DIR, 3, 'src2')
+        with mock.patch('osutil.execute_command', wraps=backup.osutil.execute_command) as execute:
+            backup.main(['--debug', '--file', TEST_XML, PROFILE_SYNC, PROFILE_SYNC_2])
+            self.assertEqual(execute.call_count, 2)
+            # profiles with the same target are synchronized by a single rsync call only with --combine
+            execute.reset_mock()
+            backup.main(['--debug', '--file', TEST_XML, '--combine', PROFILE_SYNC, PROFILE_SYNC_2])
+            self.assertEqual(execute.call_count, 1)
+        self.assertEqual(len(os.listdir(DST_1_DIR)), 8)
+    def test_sync_many_same_file(self):
+        print('======= test_sync_many_same_file ===')
+        for dir, content in ((SRC_1_DIR, 'first'), (SRC_2_DIR, 'second')):
+            # different sizes, so that rsync does not skip the file
+            os.makedirs(dir, exist_ok=True)
+            with open(os.path.join(dir, 'same.txt'), 'w') as f:
+                f.write(content)
+        # the profile given last wins if the profiles are synchronized one after the other
+        backup.main(['--debug', '--file', TEST_XML, PROFILE_SYNC, PROFILE_SYNC_2])
+        with open(os.path.join(DST_1_DIR, 'same.txt')) as f:
+            self.assertEqual(f.read(), 'second')
+        # ... and the profile given first wins if they are combined
+        backup.main(['--debug', '--file', TEST_XML, '--combine', PROFILE_SYNC, PROFILE_SYNC_2])
+        with open(os.path.join(DST_1_DIR, 'same.txt')) as f:
+            self.assertEqual(f.read(), 'first')
+    def test_sync_many_delete_option(self):
+        print('======= test_sync_many_delete_option ===')
+        self._createFiles(SRC_1_DIR, 5)
+        self._createFiles(SRC_2_DIR, 3, 'src2')
+        # profiles deleting files are synchronized one after the other
+        backup.main(['--debug', '--file', TEST_XML, '--combine', PROFILE_SYNC_DELETE, PROFILE_SYNC_2_DELETE])
+        self.assertEqual(len(os.listdir(DST_1_DIR)), 3)
+        self.assertTrue(os.path.exists(os.path.join(DST_1_DIR, 'src2-1.txt')))
+    def test_parallel(self):
+        print('======= test_parallel ===')
+        self._createFiles(SRC_1_DIR, 5)
+        self._createFiles(SRC_2_DIR, 3, 'src2')
+        os.makedirs(DST_2_DIR, exist_ok=True)
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out, mock.patch('osutil.execute_command', wraps=backup.osutil.execute_command) as execute:
+            backup.main(['--debug', '-v', '--file', TEST_XML, '--parallel', '2', PROFILE_SYNC, PROFILE_SYNC_DST_2])
+        self.assertEqual(len(os.listdir(DST_1_DIR)), 5)
+        self.assertEqual(len(os.listdir(DST_2_DIR)), 3)
+        # rsync output is printed at once per profile
+        self.assertEqual([c.kwargs['bufferOutput'] for c in execute.call_args_list], [True, True])
+        # messages of each profile are printed as one block, commands as whole lines
+        lines = out.getvalue().splitlines()
+        for name, source, target in ((PROFILE_SYNC, 'root/src-1', 'root/dst-1'), (PROFILE_SYNC_DST_2, 'root/src-2', 'root/dst-2')):
+            i = lines.index(f'===== Backup profile: {name}')
+            self.assertEqual(lines[i+1:i+3], [f'Starting backup from {source} to {target}', ''])
+            self.assertIn(f'Synchronizing from {source}/ to {target}/', lines)
+            self.assertEqual(len([l for l in lines if l.startswith('rsync ') and l.endswith(f' {source}/ {target}/')]), 1)
+    def test_parallel_same_target(self):
+        print('======= test_parallel_same_target ===')
+        self._createFiles(SRC_1_DIR, 5)
+        self._createFiles(SRC_2_DIR, 3, 'src2')
+        # profiles with the same target are backed up one after the other in the given order
+        backup.main(['--debug', '--file', TEST_XML, '--parallel', '2', PROFILE_SYNC_DELETE, PROFILE_SYNC_2_DELETE])
+        self.assertEqual(len(os.listdir(DST_1_DIR)), 3)
+        self.assertTrue(os.path.exists(os.path.join(DST_1_DIR, 'src2-1.txt')))
+    def test_parallel_lanes(self):
+        print('======= test_parallel_lanes ===')
+        profiles = []
+        for target in (DST_1_DIR, DST_2_DIR, os.path.join(DST_1_DIR, 'sub'), ROOT_DIR + '-other', ROOT_DIR):
+            profile = backup.BackupProfile()
+            profile.target = target
+            profiles.append(profile)
+        # nested targets share a lane, a common name prefix does not
+        lanes = backup._parallel_lanes([[p] for p in profiles[:4]])
+        self.assertEqual(lanes, [[[profiles[0]], [profiles[2]]], [[profiles[1]]], [[profiles[3]]]])
+        # a target containing the targets of several lanes joins them
+        lanes = backup._parallel_lanes([[p] for p in profiles])
+        self.assertEqual(lanes, [[[profiles[0]], [profiles[2]], [profiles[1]], [profiles[4]]], [[profiles[3]]]])
+    def test_buffered_output(self):
+        print('======= test_buffered_output ===')
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            p = backup.osutil.execute_command([sys.executable, '-c', 'print("line 1"); print("line 2")'], bufferOutput=True)
+        self.assertEqual(p.stdout, 'line 1\nline 2\n')
+        self.assertEqual(out.getvalue(), 'line 1\nline 2\n')
+    def test_parallel_errors(self):
+        print('======= test_parallel_errors ===')
+        # src-1 is empty and src-2 does not exist
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            backup.main(['--debug', '--file', TEST_XML, '--parallel', '2', PROFILE_SYNC, PROFILE_SYNC_DST_2])
+        output = out.getvalue()
+        self.assertIn(f'Backup of {PROFILE_SYNC} failed: Source is empty', output)
+        self.assertIn(f'Backup of {PROFILE_SYNC_DST_2} failed: Source does not exist', output)
+        self.assertIn('2 of 2 backups failed', output)
     
     def test_incr(self):
         print('======= test_incr ===')
@@ -87,6 +274,26 @@ class TestBackup(unittest.TestCase):
         TARGET_FOLDER = os.path.join(DST_1_DIR, datetime.datetime.now().strftime("%Y-%m-%d"))
         self.assertEqual(len(os.listdir(TARGET_FOLDER)), 5)
         self.assertTrue(os.path.exists(os.path.join(TARGET_FOLDER, 'file-1.txt')))
+    def test_incr_keep_deleted(self):
+        print('======= test_incr_keep_deleted ===')
+        self._createFiles(SRC_1_DIR, 5)
+        folder2020 = os.path.join(DST_1_DIR, '2020-03-12')
+        self._createFiles(folder2020, 1, 'deleted')
+        TARGET_FOLDER = os.path.join(DST_1_DIR, datetime.datetime.now().strftime("%Y-%m-%d"))
+        # files deleted in source are kept in the next backup
+        with mock.patch('osutil.execute_command', wraps=backup.osutil.execute_command) as execute:
+            backup.main(['--debug', '--file', TEST_XML, PROFILE_INCR])
+        self.assertEqual(len(os.listdir(TARGET_FOLDER)), 6)
+        self.assertTrue(os.path.exists(os.path.join(TARGET_FOLDER, 'deleted-1.txt')))
+        self.assertEqual(os.stat(os.path.join(TARGET_FOLDER, 'deleted-1.txt')).st_ino, os.stat(os.path.join(folder2020, 'deleted-1.txt')).st_ino)
+        # rsync does not need the old backup any more, its files are already linked
+        self.assertEqual([c.args[0][0] for c in execute.call_args_list], ['cp', 'rsync'])
+        self.assertFalse(any(a.startswith('--link-dest') for a in execute.call_args_list[1].args[0]))
+        # ... unless --delete is given
+        shutil.rmtree(TARGET_FOLDER)
+        backup.main(['--debug', '--file', TEST_XML, '--delete', PROFILE_INCR])
+        self.assertEqual(len(os.listdir(TARGET_FOLDER)), 5)
+        self.assertTrue(os.path.exists(os.path.join(folder2020, 'deleted-1.txt')))
     def test_incr_dryrun(self):
         print('======= test_incr_dryrun ===')
         self._createFiles(SRC_1_DIR, 5)
@@ -162,12 +369,35 @@ class TestBackup(unittest.TestCase):
         shutil.rmtree(ROOT_DIR)
     
     # Helper methods
+    def _runMain(self, argv):
+        with self.assertRaises(SystemExit) as cm:
+            backup.main(argv)
+        return cm.exception.code
+    def _copyXml(self):
+        xmlFile = os.path.join(ROOT_DIR, 'backup.xml')
+        shutil.copyfile(TEST_XML, xmlFile)
+        return xmlFile
+    def _renameProfile(self, xmlFile, oldName, newName):
+        with open(xmlFile, 'r') as f:
+            content = f.read()
+        with open(xmlFile, 'w') as f:
+            f.write(content.replace(f'<name>{oldName}</name>', f'<name>{newName}</name>'))
     def _createFiles(self, dir, numberFiles=1, prefix='file'):
+        """Creates empty files. All files are hard links to the first one, so do not write content into them."""
         os.makedirs(dir, exist_ok=True)
+        first = None
         for i in range(0, numberFiles):
             fileName = os.path.join(dir, f'{prefix}-{i+1}.txt')
-            with open(fileName, 'x') as f:
-                pass
+            if first is not None:
+                try:
+                    os.link(first, fileName)
+                    continue
+                except OSError:
+                    pass
+            # create empty file without the overhead of a file object
+            fd = os.open(fileName, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            os.close(fd)
+            first = fileName
             
 
 if __name__ == '__main__':
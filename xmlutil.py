@@ -1,15 +1,42 @@
 #!/usr/bin/env python3
 
+import functools
 import logging
 import os
 import subprocess
 import sys
 
+def _is_lxml(element):
+    """Returns True if the element has been created by lxml.
+    lxml is never imported here, it is only used if the caller has already loaded it.
+    """
+    etree = sys.modules.get("lxml.etree")
+    return etree is not None and isinstance(element, etree._Element)
+
+@functools.lru_cache(maxsize=256)
+def _xpath(tagName):
+    """Returns the compiled XPath expression to find all child tags with the given name."""
+    from lxml import etree
+    return etree.XPath(tagName)
+
+def _find(element, tagName):
+    """Returns the first child tag with the given name or None."""
+    if _is_lxml(element):
+        nodes = _xpath(tagName)(element)
+        return nodes[0] if nodes else None
+    return element.find(tagName)
+
+def _find_all(element, tagName):
+    """Returns all child tags with the given name."""
+    if _is_lxml(element):
+        return _xpath(tagName)(element)
+    return element.findall(tagName)
+
 def parse_xml_tag(element, tagName, required=False):
     """Helper function to analyse a xml tag."""
-    if element.find(tagName) is not None:
-        if element.find(tagName).text is not None:
-            return element.find(tagName).text
+    node = _find(element, tagName)
+    if node is not None and node.text is not None:
+        return node.text
     if required:
         raise Exception(f'Required tag missing: {tagName}')
     return None 
@@ -17,15 +44,16 @@ def parse_xml_tag(element, tagName, required=False):
 def parse_xml_tag_list(element, tagName):
     """Helper function to analyse a xml tag which can be occure several times."""
     items = list()
-    tags = element.findall(tagName)
-    for tagName in tags:
-        items.append(tagName.text)
+    tags = _find_all(element, tagName)
+    for t in tags:
+        items.append(t.text)
     return items
 
 def parse_xml_attrib(element, attrName, required=False, default=None):
     """Helper function to analyse a xml attribute."""
-    if attrName in element.attrib:
-        return element.attrib[attrName]
+    value = element.get(attrName)
+    if value is not None:
+        return value
     if required:
         raise Exception(f'Required attribute missing: {attrName}')
     return default 